@@ -2,15 +2,19 @@
 import time
 import rospy
 import gymnasium as gym
+from abc import ABC, abstractmethod
 
 from realros.utils import ros_common
 from realros.utils import ros_controllers
 from typing import List, Any, Dict, Optional
 
 
-class RealBaseEnv(gym.Env):
+class RealBaseEnv(gym.Env, ABC):
     """
     A custom gymnasium environment for reinforcement learning using ROS and real robots.
+
+    The methods used in the step loop are abstract, so an env that misses one of them fails when it is created,
+    not in the middle of an episode.
     """
 
     def __init__(self, load_robot: bool = True, robot_pkg_name: str = None,
@@ -302,6 +306,7 @@ class RealBaseEnv(gym.Env):
     # ---------------------------------------------
     #   Methods to override in CustomTaskEnv
 
+    @abstractmethod
     def _set_action(self, action):
         """
         Function to apply an action to the robot.
@@ -312,8 +317,8 @@ class RealBaseEnv(gym.Env):
         Args:
             action: The action to be applied to the robot.
         """
-        raise NotImplementedError()
 
+    @abstractmethod
     def _get_observation(self):
         """
         Function to get an observation from the environment.
@@ -325,8 +330,8 @@ class RealBaseEnv(gym.Env):
         Returns:
             An observation representing the current state of the environment.
         """
-        raise NotImplementedError()
 
+    @abstractmethod
     def _get_reward(self, info: Optional[Dict[str, Any]] = None):
         """
         Function to compute a reward from the environment.
@@ -341,8 +346,8 @@ class RealBaseEnv(gym.Env):
         Returns:
             A scalar reward value representing how well the agent is doing in the current episode.
         """
-        raise NotImplementedError()
 
+    @abstractmethod
     def _compute_terminated(self, info: Optional[Dict[str, Any]] = None):
         """
         Function to check if the episode is terminated due to reaching a terminal state.
@@ -357,8 +362,8 @@ class RealBaseEnv(gym.Env):
             A boolean value indicating whether the episode has ended
             (e.g., because a goal has been reached or a failure condition has been triggered)
         """
-        raise NotImplementedError()
 
+    @abstractmethod
     def _compute_truncated(self, info: Optional[Dict[str, Any]] = None):
         """
         Function to check if the episode is truncated due non-terminal reasons.
@@ -375,7 +380,6 @@ class RealBaseEnv(gym.Env):
         Returns:
             A boolean value indicating whether the episode has been truncated.
         """
-        raise NotImplementedError()
 
     def _set_init_params(self, options: Optional[Dict[str, Any]] = None):
         """
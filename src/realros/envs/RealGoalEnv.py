@@ -2,15 +2,19 @@
 
 import rospy
 import gymnasium_robotics
+from abc import ABC, abstractmethod
 from realros.utils import ros_common
 from realros.utils import ros_controllers
 from typing import List, Any, Dict, Optional
 import time
 
 
-class RealGoalEnv(gymnasium_robotics.GoalEnv):
+class RealGoalEnv(gymnasium_robotics.GoalEnv, ABC):
     """
     A custom gymnasium robotics goal-conditioned environment for reinforcement learning using ROS and real robots.
+
+    The methods used in the step loop are abstract, so an env that misses one of them fails when it is created,
+    not in the middle of an episode.
     """
 
     def __init__(self, load_robot: bool = True, robot_pkg_name: str = None, robot_launch_file: str = None,
@@ -308,6 +312,7 @@ class RealGoalEnv(gymnasium_robotics.GoalEnv):
     # ---------------------------------------------
     #   Methods to override in CustomTaskEnv
 
+    @abstractmethod
     def _set_action(self, action):
         """
         Function to apply an action to the robot.
@@ -318,8 +323,8 @@ class RealGoalEnv(gymnasium_robotics.GoalEnv):
         Args:
             action: The action to be applied to the robot.
         """
-        raise NotImplementedError()
 
+    @abstractmethod
     def _get_observation(self):
         """
         Function to get an observation from the environment.
@@ -331,8 +336,8 @@ class RealGoalEnv(gymnasium_robotics.GoalEnv):
         Returns:
             An observation representing the current state of the environment.
         """
-        raise NotImplementedError()
 
+    @abstractmethod
     def compute_terminated(self, achieved_goal, desired_goal, info):
         """
         Function to check if the episode is terminated due to reaching a terminal state.
@@ -349,8 +354,8 @@ class RealGoalEnv(gymnasium_robotics.GoalEnv):
             A boolean value indicating whether the episode has ended
             (e.g., because a goal has been reached or a failure condition has been triggered)
         """
-        raise NotImplementedError()
 
+    @abstractmethod
     def compute_truncated(self, achieved_goal, desired_goal, info):
         """
         Function to check if the episode is truncated due non-terminal reasons.
@@ -369,7 +374,6 @@ class RealGoalEnv(gymnasium_robotics.GoalEnv):
         Returns:
             A boolean value indicating whether the episode has been truncated.
         """
-        raise NotImplementedError()
 
     def _set_init_params(self, options: Optional[Dict[str, Any]] = None):
         """
@@ -384,6 +388,7 @@ class RealGoalEnv(gymnasium_robotics.GoalEnv):
         """
         raise NotImplementedError()
 
+    @abstractmethod
     def _get_achieved_goal(self):
         """
         Get the achieved goal from the environment.
@@ -391,8 +396,8 @@ class RealGoalEnv(gymnasium_robotics.GoalEnv):
         Returns:
             achieved_goal (Any): The achieved goal representing the current state of the environment.
         """
-        raise NotImplementedError()
 
+    @abstractmethod
     def _get_desired_goal(self):
         """
         Get the desired goal from the environment.
@@ -400,8 +405,8 @@ class RealGoalEnv(gymnasium_robotics.GoalEnv):
         Returns:
             desired_goal (Any): The desired goal representing the target state of the environment.
         """
-        raise NotImplementedError()
 
+    @abstractmethod
     def compute_reward(self, achieved_goal, desired_goal, info) -> float:
         """
         Compute the reward for achieving a given goal.
@@ -419,8 +424,6 @@ class RealGoalEnv(gymnasium_robotics.GoalEnv):
             reward (float): The reward for achieving the given goal.
         """
 
-        raise NotImplementedError()
-
     # ------------------------------------------
     #   Methods to override in CustomRobotEnv
 
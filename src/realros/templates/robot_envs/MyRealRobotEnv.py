@@ -2,6 +2,7 @@
 
 import rospy
 import rostopic
+from abc import abstractmethod
 from gymnasium import spaces
 from gymnasium.envs.registration import register
 from typing import Optional, List, Any, Dict
@@ -216,6 +217,7 @@ class MyRealRobotEnv(RealBaseEnv.RealBaseEnv):
     # ---------------------------------------------------
     #    Methods to override in Custom Task Environment
 
+    @abstractmethod
     def _set_action(self, action):
         """
         Function to apply an action to the robot.
@@ -226,8 +228,8 @@ class MyRealRobotEnv(RealBaseEnv.RealBaseEnv):
         Args:
             action: The action to be applied to the robot.
         """
-        raise NotImplementedError()
 
+    @abstractmethod
     def _get_observation(self):
         """
         Get an observation from the environment.
@@ -239,8 +241,8 @@ class MyRealRobotEnv(RealBaseEnv.RealBaseEnv):
         Returns:
             observation (Any): An observation representing the current state of the environment.
         """
-        raise NotImplementedError()
 
+    @abstractmethod
     def _get_reward(self, info: Optional[Dict[str, Any]] = None):
         """
         Function to get a reward from the environment.
@@ -255,8 +257,8 @@ class MyRealRobotEnv(RealBaseEnv.RealBaseEnv):
         Returns:
             A scalar reward value representing how well the agent is doing in the current episode.
         """
-        raise NotImplementedError()
 
+    @abstractmethod
     def _compute_terminated(self, info: Optional[Dict[str, Any]] = None):
         """
         Function to check if the episode is terminated due to reaching a terminal state.
@@ -271,8 +273,8 @@ class MyRealRobotEnv(RealBaseEnv.RealBaseEnv):
             A boolean value indicating whether the episode has ended
             (e.g., because a goal has been reached or a failure condition has been triggered)
         """
-        raise NotImplementedError()
 
+    @abstractmethod
     def _compute_truncated(self, info: Optional[Dict[str, Any]] = None):
         """
         Function to check if the episode is truncated due non-terminal reasons.
@@ -289,7 +291,6 @@ class MyRealRobotEnv(RealBaseEnv.RealBaseEnv):
         Returns:
             A boolean value indicating whether the episode has been truncated.
         """
-        raise NotImplementedError()
 
     def _set_init_params(self, options: Optional[Dict[str, Any]] = None):
         """
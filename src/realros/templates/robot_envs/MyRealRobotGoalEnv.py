@@ -2,6 +2,7 @@
 
 import rospy
 import rostopic
+from abc import abstractmethod
 from gymnasium import spaces
 from gymnasium.envs.registration import register
 from typing import List, Any, Dict, Optional
@@ -215,6 +216,7 @@ class MyRealRobotGoalEnv(RealGoalEnv.RealGoalEnv):
     # ---------------------------------------------------
     #    Methods to override in Custom Task Environment
 
+    @abstractmethod
     def _set_action(self, action):
         """
         Function to apply an action to the robot.
@@ -225,8 +227,8 @@ class MyRealRobotGoalEnv(RealGoalEnv.RealGoalEnv):
         Args:
             action: The action to be applied to the robot.
         """
-        raise NotImplementedError()
 
+    @abstractmethod
     def _get_observation(self):
         """
         Get an observation from the environment.
@@ -238,8 +240,8 @@ class MyRealRobotGoalEnv(RealGoalEnv.RealGoalEnv):
         Returns:
             observation (Any): An observation representing the current state of the environment.
         """
-        raise NotImplementedError()
 
+    @abstractmethod
     def compute_reward(self, achieved_goal, desired_goal, info) -> float:
         """
         Compute the reward for achieving a given goal.
@@ -257,8 +259,7 @@ class MyRealRobotGoalEnv(RealGoalEnv.RealGoalEnv):
             reward (float): The reward for achieving the given goal.
         """
 
-        raise NotImplementedError()
-
+    @abstractmethod
     def compute_terminated(self, achieved_goal, desired_goal, info):
         """
         Function to check if the episode is terminated due to reaching a terminal state.
@@ -275,8 +276,8 @@ class MyRealRobotGoalEnv(RealGoalEnv.RealGoalEnv):
             A boolean value indicating whether the episode has ended
             (e.g., because a goal has been reached or a failure condition has been triggered)
         """
-        raise NotImplementedError()
 
+    @abstractmethod
     def compute_truncated(self, achieved_goal, desired_goal, info):
         """
         Function to check if the episode is truncated due non-terminal reasons.
@@ -295,7 +296,6 @@ class MyRealRobotGoalEnv(RealGoalEnv.RealGoalEnv):
         Returns:
             A boolean value indicating whether the episode has been truncated.
         """
-        raise NotImplementedError()
 
     def _set_init_params(self, options: Optional[Dict[str, Any]] = None):
         """
@@ -310,6 +310,7 @@ class MyRealRobotGoalEnv(RealGoalEnv.RealGoalEnv):
         """
         raise NotImplementedError()
 
+    @abstractmethod
     def _get_achieved_goal(self):
         """
         Get the achieved goal from the environment.
@@ -317,8 +318,8 @@ class MyRealRobotGoalEnv(RealGoalEnv.RealGoalEnv):
         Returns:
             achieved_goal (Any): The achieved goal representing the current state of the environment.
         """
-        raise NotImplementedError()
 
+    @abstractmethod
     def _get_desired_goal(self):
         """
         Get the desired goal from the environment.
@@ -326,4 +327,3 @@ class MyRealRobotGoalEnv(RealGoalEnv.RealGoalEnv):
         Returns:
             desired_goal (Any): The desired goal representing the target state of the environment.
         """
-        raise NotImplementedError()
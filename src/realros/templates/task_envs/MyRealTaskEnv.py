@@ -1,7 +1,11 @@
 #!/bin/python3
 
+import os
+import logging
+import functools
 import rospy
-from gymnasium.envs.registration import register
+from abc import abstractmethod
+from gymnasium.envs.registration import register, registry
 import numpy as np
 from gymnasium import spaces
 from typing import Optional, List, Any, Dict
@@ -12,21 +16,27 @@ from realros.templates.robot_envs import MyRealRobotEnv
 # core modules of the framework
 from realros.utils import ros_common
 # from realros.utils import ros_controllers
-from realros.utils import ros_markers
-
-# Register your environment using the gymnasium register method to utilize gym.make("TaskEnv-v0").
-register(
-    id='MyRealTaskEnv-v0',
-    entry_point='realros.templates.task_envs.MyRealTaskEnv:MyRealTaskEnv',
-    max_episode_steps=100,
-)
 
 
 class MyRealTaskEnv(MyRealRobotEnv.MyRealRobotEnv):
     """
     Use this custom env to implement a task using the robot/sensors related functions defined in the MyRobotEnv
+
+    The methods marked with @abstractmethod must be implemented (in a subclass, or in your copy of this template after
+    removing the decorator). Otherwise, the env fails when it is created.
     """
 
+    # Attributes of this env. Add the new attributes you define in this class here.
+    # Note: the base envs still have a __dict__, so attributes not listed here (e.g. goal_marker) keep working.
+    __slots__ = ('node_name', 'action_space', 'observation_space', '_max_episode_steps', '_step_count',
+                 '_action_buf', '_latest_msg')
+
+    # Functions often used in the step loop, bound once to avoid the global and attribute lookups on every call.
+    # e.g. self._np_clip(...) in _set_action
+    _np_clip = staticmethod(np.clip)
+    _np_norm = staticmethod(np.linalg.norm)
+    _now = staticmethod(rospy.Time.now)
+
     def __init__(self, new_roscore: bool = True, roscore_port: str = None, seed: int = None,
                  reset_env_prompt: bool = False, action_cycle_time: float = 0.0, default_port=False):
         """
@@ -34,7 +44,7 @@ class MyRealTaskEnv(MyRealRobotEnv.MyRealRobotEnv):
         In the initialization statement, you can initialize any desired number and type of variables and pass the
         values to the environment as shown below:
 
-        env = gym.make("TaskEnv-v0", reset_env_prompt = True, new_roscore = True)
+        env = gym.make("MyRealTaskEnv-v0", reset_env_prompt = True, new_roscore = True)
 
         """
 
@@ -56,50 +66,35 @@ class MyRealTaskEnv(MyRealRobotEnv.MyRealRobotEnv):
         # if you didn't include the seed variable in __init__, uncomment here
         # reset_env_prompt = False
 
-        """
-        variables to keep track of ros port
-        """
-        ros_port = None
-
         """
         Initialise the env
-        """
-
-        # launch a new roscore with default port
-        if default_port:
-            ros_port = self._launch_roscore(default_port=default_port)
-
-        # Launch new roscore
-        elif new_roscore:
-            ros_port = self._launch_roscore(port=roscore_port)
-
-        # ros_port of the already running roscore
-        elif roscore_port is not None:
-            ros_port = roscore_port
-
-            # change to new rosmaster
-            ros_common.change_ros_master(ros_port)
 
-        else:
-            """
-            Check for roscore
-            """
-            if ros_common.is_roscore_running() is False:
-                print("roscore is not running! Launching a new roscore!")
-                ros_port = self._launch_roscore(port=roscore_port)
+        Launch a new roscore (or reuse the one this process launched before), or connect to a running roscore.
+        ros_port is None if we use the running roscore of the current ROS_MASTER_URI.
+        """
+        ros_port = ros_common.ensure_master(default_port=default_port, new_roscore=new_roscore,
+                                            roscore_port=roscore_port)
 
         # init the ros node
+        # the port and the pid make the name unique, so we don't need an anonymous node.
+        # disable_signals: let the training script (or the vec env worker) handle SIGINT instead of rospy
         if ros_port is not None:
-            self.node_name = "TaskEnv" + "_" + ros_port
+            self.node_name = f"TaskEnv_{ros_port}_{os.getpid()}"
         else:
-            self.node_name = "TaskEnv"
+            self.node_name = f"TaskEnv_{os.getpid()}"
+
+        # a process can only have one node, so skip it if the env is re-created (e.g. in notebooks or sweeps)
+        if not ros_common.init_node_once(self.node_name, anonymous=False, disable_signals=True):
+            self.node_name = rospy.get_name().lstrip('/')
 
-        rospy.init_node(self.node_name, anonymous=True)
+        # cache the rosout params, so the log calls don't query the ROS Master each time
+        ros_common.cache_rosout_params()
 
         """
         Provide a description of the task.
         """
-        rospy.loginfo("Starting Custom Task Env")
+        if ros_common.is_log_level_enabled(logging.INFO):
+            rospy.loginfo("Starting Custom Task Env")
 
         """
         Load YAML param file
@@ -107,13 +102,15 @@ class MyRealTaskEnv(MyRealRobotEnv.MyRealRobotEnv):
 
         # add to ros parameter server
         # ros_common.ros_load_yaml(pkg_name="pkg_name", file_name="file_name.yaml", ns="ns")
-        # self._get_params()
+        # self._get_params()  # uses self._param(...) to read the params through the local parameter cache
 
         """
         Define the action space.
         """
         # self.action_space = spaces.Discrete(n_actions)
-        # self.action_space = spaces.Box(low=0, high=1, shape=(1,), dtype=np.float32)
+        # self.action_space = spaces.Box(low=np.float32(0.0), high=np.float32(1.0), shape=(n_actions,),
+        #                                dtype=np.float32)
+        # self._action_buf = np.empty(n_actions, dtype=np.float32)  # reusable buffer for the actions in _set_action
         # ROS often use double-precision (64-bit)
         # But if you are using Stable Baseline3, you need to define them as float32, otherwise it won't work
 
@@ -123,12 +120,28 @@ class MyRealTaskEnv(MyRealRobotEnv.MyRealRobotEnv):
         # self.observation_space = spaces.Discrete(n_observations)
         # self.observation_space = spaces.Box(low=0, high=1, shape=(1,), dtype=np.float32)
 
+        """
+        Maximum number of steps per episode.
+        The truncation is done in the _compute_truncated method and the step counter is reset in reset, so we don't
+        register the env with max_episode_steps (which wraps the env with a TimeLimit wrapper).
+        """
+        self._max_episode_steps = 100
+        self._step_count = 0
+
         """
         Define subscribers/publishers and Markers as needed.
         """
 
-        # self.goal_marker = ros_markers.RosMarker(frame_id="world", ns="", marker_type=2, marker_topic="goal_pos",
-        #                                          lifetime=10.0)
+        # Subscribers for observations: only keep the latest message.
+        #   queue_size=1: drop old messages instead of queueing them behind a slow callback
+        #   buff_size: large enough to hold a whole message (the default 64KB causes lags with big messages)
+        #   tcp_nodelay=True: disable Nagle's algorithm, so small messages are sent right away
+        # self._latest_msg = None
+        # self.sub = rospy.Subscriber("/topic_name", MsgType, self._sub_callback, queue_size=1, buff_size=2**24,
+        #                             tcp_nodelay=True)
+
+        # Markers are created lazily (see the goal_marker property below), so headless training doesn't advertise
+        # marker topics that are never used. Access self.goal_marker when you want to visualize the goal.
 
         """
         Init super class.
@@ -139,11 +152,26 @@ class MyRealTaskEnv(MyRealRobotEnv.MyRealRobotEnv):
         """
         Finished __init__ method
         """
-        rospy.loginfo("Finished Init of Custom Task Env")
+        if ros_common.is_log_level_enabled(logging.INFO):
+            rospy.loginfo("Finished Init of Custom Task Env")
 
     # -------------------------------------------------------
     #   Methods for interacting with the environment
 
+    def reset(self, seed: Optional[int] = None, options: Optional[Dict[str, Any]] = None):
+        """
+        Reset the environment.
+
+        Resets the step counter used by _compute_truncated here, so overriding _set_init_params doesn't affect it.
+
+        Args:
+            seed (int): The seed for the random number generator.
+            options (dict): Additional options for resetting the environment.
+        """
+        self._step_count = 0
+
+        return super().reset(seed=seed, options=options)
+
     def _set_init_params(self, options: Optional[Dict[str, Any]] = None):
         """
         Set initial parameters for the environment.
@@ -158,6 +186,7 @@ class MyRealTaskEnv(MyRealRobotEnv.MyRealRobotEnv):
         """
         raise NotImplementedError()
 
+    @abstractmethod
     def _set_action(self, action):
         """
         Function to apply an action to the robot.
@@ -165,11 +194,14 @@ class MyRealTaskEnv(MyRealRobotEnv.MyRealRobotEnv):
         This method should be implemented here to apply the given action to the robot. The action could be a
         joint position command, a velocity command, or any other type of command that can be applied to the robot.
 
+        Use the pre-allocated self._action_buf to process the action without allocating a new array, e.g.
+            self._np_clip(action, 0.0, 1.0, out=self._action_buf)
+
         Args:
             action: The action to be applied to the robot.
         """
-        raise NotImplementedError()
 
+    @abstractmethod
     def _get_observation(self):
         """
         Function to get an observation from the environment.
@@ -181,8 +213,8 @@ class MyRealTaskEnv(MyRealRobotEnv.MyRealRobotEnv):
         Returns:
             An observation representing the current state of the environment.
         """
-        raise NotImplementedError()
 
+    @abstractmethod
     def _get_reward(self, info: Optional[Dict[str, Any]] = None):
         """
         Function to get a reward from the environment.
@@ -197,8 +229,8 @@ class MyRealTaskEnv(MyRealRobotEnv.MyRealRobotEnv):
         Returns:
             A scalar reward value representing how well the agent is doing in the current episode.
         """
-        raise NotImplementedError()
 
+    @abstractmethod
     def _compute_terminated(self, info: Optional[Dict[str, Any]] = None):
         """
         Function to check if the episode is terminated due to reaching a terminal state.
@@ -213,7 +245,6 @@ class MyRealTaskEnv(MyRealRobotEnv.MyRealRobotEnv):
             A boolean value indicating whether the episode has ended
             (e.g., because a goal has been reached or a failure condition has been triggered)
         """
-        raise NotImplementedError()
 
     def _compute_truncated(self, info: Optional[Dict[str, Any]] = None):
         """
@@ -231,36 +262,60 @@ class MyRealTaskEnv(MyRealRobotEnv.MyRealRobotEnv):
         Returns:
             A boolean value indicating whether the episode has been truncated.
         """
-        raise NotImplementedError()
+        self._step_count += 1
+        return self._step_count >= self._max_episode_steps
 
     # -------------------------------------------------------
     #   Include any custom methods available for the MyTaskEnv class
 
+    # def _sub_callback(self, msg):
+    #     """
+    #     Keep only the latest message. _get_observation reads self._latest_msg, so it always uses the freshest data.
+    #     """
+    #     self._latest_msg = msg
+
+    @functools.cached_property
+    def goal_marker(self):
+        """
+        Marker to visualize the goal. Only created (and advertised to the ROS Master) on first access.
+        """
+        from realros.utils import ros_markers
+
+        return ros_markers.RosMarker(frame_id="world", ns="", marker_type=2, marker_topic="goal_pos", lifetime=10.0)
+
     def _get_params(self):
         """
         Function to get configuration parameters (optional)
-        """
-        raise NotImplementedError()
 
-    # ------------------------------------------------------
-    #   Task Methods for launching roscore
+        Use self._param(name, default) instead of rospy.get_param(name) to read the parameters. rospy.get_param
+        queries the ROS Master on every call, while self._param uses the local parameter cache.
 
-    @staticmethod
-    def _launch_roscore(port=None, set_new_master_vars=False, default_port=False):
+        example:
+            self.max_steps = self._param("/my_task/max_steps", 100)
         """
-        Launches a new roscore with the specified port. Only updates the ros_port.
+        raise NotImplementedError()
 
-        Return:
-            ros_port: port of launched roscore
+    @staticmethod
+    def _param(name: str, default=None):
         """
+        Get a parameter from the parameter server using the local parameter cache.
 
-        if port is None:
-            port = 11311  # default port
+        Args:
+            name (str): Name of the parameter.
+            default: Value to return if the parameter is not set.
 
-        ros_port = ros_common.launch_roscore(port=port, set_new_master_vars=set_new_master_vars,
-                                             default_port=default_port)
+        Returns:
+            The value of the parameter, or the default value if it is not set.
+        """
+        return ros_common.get_cached_param(name, default)
 
-        # change to new rosmaster
-        ros_common.change_ros_master(ros_port)
 
-        return ros_port
+# Register your environment using the gymnasium register method to utilize gym.make("MyRealTaskEnv-v0").
+# Registered here, after the class definition, so the class itself can be the entry point.
+# Only skipped if the id is already registered to this same class. If it is registered to another class (e.g. a copy
+# of this template that kept the id, or a reload of this module), it is registered again and gymnasium warns about it.
+if 'MyRealTaskEnv-v0' not in registry or registry['MyRealTaskEnv-v0'].entry_point is not MyRealTaskEnv:
+    register(
+        id='MyRealTaskEnv-v0',
+        entry_point=MyRealTaskEnv,
+    )
@@ -1,10 +1,14 @@
 #!/bin/python3
 
+import os
+import logging
+import functools
 import rospy
+from abc import abstractmethod
 import numpy as np
 from gymnasium import spaces
-from gymnasium.envs.registration import register
-from typing import List, Any, Dict, Optional
+from gymnasium.envs.registration import register, registry
+from typing import List, Any, Dict, Optional, Union
 
 # Custom robot env
 from realros.templates.robot_envs import MyRealRobotGoalEnv
@@ -12,21 +16,28 @@ from realros.templates.robot_envs import MyRealRobotGoalEnv
 # core modules of the framework
 from realros.utils import ros_common
 # from realros.utils import ros_controllers
-from realros.utils import ros_markers
-
-# Register your environment using the gymnasium register method to utilize gym.make("MyTaskGoalEnv-v0").
-register(
-    id='MyRealTaskGoalEnv-v0',
-    entry_point='realros.templates.task_envs.MyRealTaskGoalEnv:MyRealTaskGoalEnv',
-    max_episode_steps=100,
-)
 
 
 class MyRealTaskGoalEnv(MyRealRobotGoalEnv.MyRealRobotGoalEnv):
     """
     Use this custom env to implement a task using the robot/sensors related functions defined in the MyRobotGoalEnv
+
+    The methods marked with @abstractmethod must be implemented (in a subclass, or in your copy of this template after
+    removing the decorator). Otherwise, the env fails when it is created.
     """
 
+    # Attributes of this env. Add the new attributes you define in this class here.
+    # Note: the base envs still have a __dict__, so attributes not listed here (e.g. goal_marker) keep working.
+    __slots__ = ('node_name', 'action_space', 'observation_space', 'achieved_goal_space', 'desired_goal_space',
+                 '_threshold', '_obs_buf', '_ag_buf', '_dg_buf', '_max_episode_steps', '_step_count', '_action_buf',
+                 '_latest_msg')
+
+    # Functions often used in the step loop, bound once to avoid the global and attribute lookups on every call.
+    # e.g. self._np_clip(...) in _set_action
+    _np_clip = staticmethod(np.clip)
+    _np_norm = staticmethod(np.linalg.norm)
+    _now = staticmethod(rospy.Time.now)
+
     def __init__(self, new_roscore: bool = True, roscore_port: str = None, seed: int = None,
                  reset_env_prompt: bool = False, action_cycle_time: float = 0.0, default_port=False):
         """
@@ -34,7 +45,7 @@ class MyRealTaskGoalEnv(MyRealRobotGoalEnv.MyRealRobotGoalEnv):
         In the initialization statement, you can initialize any desired number and type of variables and pass the
         values to the environment as shown below:
 
-        env = gym.make("MyTaskGoalEnv-v0", reset_env_prompt = True, new_roscore = True)
+        env = gym.make("MyRealTaskGoalEnv-v0", reset_env_prompt = True, new_roscore = True)
 
         """
 
@@ -56,50 +67,35 @@ class MyRealTaskGoalEnv(MyRealRobotGoalEnv.MyRealRobotGoalEnv):
         # if you didn't include the seed variable in __init__, uncomment here
         # reset_env_prompt = False
 
-        """
-        variables to keep track of ros port
-        """
-        ros_port = None
-
         """
         Initialise the env
-        """
 
-        # launch a new roscore with default port
-        if default_port:
-            ros_port = self._launch_roscore(default_port=default_port)
-
-        # Launch new roscore
-        elif new_roscore:
-            ros_port = self._launch_roscore(port=roscore_port)
-
-        # ros_port of the already running roscore
-        elif roscore_port is not None:
-            ros_port = roscore_port
-
-            # change to new rosmaster
-            ros_common.change_ros_master(ros_port)
-
-        else:
-            """
-            Check for roscore
-            """
-            if ros_common.is_roscore_running() is False:
-                print("roscore is not running! Launching a new roscore!")
-                ros_port = self._launch_roscore(port=roscore_port)
+        Launch a new roscore (or reuse the one this process launched before), or connect to a running roscore.
+        ros_port is None if we use the running roscore of the current ROS_MASTER_URI.
+        """
+        ros_port = ros_common.ensure_master(default_port=default_port, new_roscore=new_roscore,
+                                            roscore_port=roscore_port)
 
         # init the ros node
+        # the port and the pid make the name unique, so we don't need an anonymous node.
+        # disable_signals: let the training script (or the vec env worker) handle SIGINT instead of rospy
         if ros_port is not None:
-            self.node_name = "TaskEnv" + "_" + ros_port
+            self.node_name = f"TaskEnv_{ros_port}_{os.getpid()}"
         else:
-            self.node_name = "TaskEnv"
+            self.node_name = f"TaskEnv_{os.getpid()}"
 
-        rospy.init_node(self.node_name, anonymous=True)
+        # a process can only have one node, so skip it if the env is re-created (e.g. in notebooks or sweeps)
+        if not ros_common.init_node_once(self.node_name, anonymous=False, disable_signals=True):
+            self.node_name = rospy.get_name().lstrip('/')
+
+        # cache the rosout params, so the log calls don't query the ROS Master each time
+        ros_common.cache_rosout_params()
 
         """
         Provide a description of the task.
         """
-        rospy.loginfo("Starting Custom Task Env")
+        if ros_common.is_log_level_enabled(logging.INFO):
+            rospy.loginfo("Starting Custom Task Env")
 
         """
         Load YAML param file
@@ -107,13 +103,15 @@ class MyRealTaskGoalEnv(MyRealRobotGoalEnv.MyRealRobotGoalEnv):
 
         # add to ros parameter server
         # ros_common.ros_load_yaml(pkg_name="pkg_name", file_name="file_name.yaml", ns="ns")
-        # self._get_params()
+        # self._get_params()  # uses self._param(...) to read the params through the local parameter cache
 
         """
         Define the action space.
         """
         # self.action_space = spaces.Discrete(n_actions)
-        # self.action_space = spaces.Box(low=0, high=1, shape=(1,), dtype=np.float32)
+        # self.action_space = spaces.Box(low=np.float32(0.0), high=np.float32(1.0), shape=(n_actions,),
+        #                                dtype=np.float32)
+        # self._action_buf = np.empty(n_actions, dtype=np.float32)  # reusable buffer for the actions in _set_action
         # ROS often use double-precision (64-bit)
         # But if you are using Stable Baseline3, you need to define them as float32; otherwise it won't work
 
@@ -126,9 +124,12 @@ class MyRealTaskGoalEnv(MyRealRobotGoalEnv.MyRealRobotGoalEnv):
             desired_goal: 
         """
 
-        # Define the achieved_goal and desired_goal subspaces
-        self.achieved_goal_space = spaces.Box(low=0, high=1, shape=(3,))
-        self.desired_goal_space = spaces.Box(low=0, high=1, shape=(3,))
+        # Define the achieved_goal and desired_goal subspaces (float32, same as the observation and Stable Baselines3)
+        self.achieved_goal_space = spaces.Box(low=0.0, high=1.0, shape=(3,), dtype=np.float32)
+        self.desired_goal_space = spaces.Box(low=0.0, high=1.0, shape=(3,), dtype=np.float32)
+
+        # distance threshold to consider the goal as reached (used by compute_reward and compute_terminated)
+        self._threshold = 0.05
 
         # Define the overall observation space
         self.observation_space = spaces.Dict({
@@ -137,12 +138,37 @@ class MyRealTaskGoalEnv(MyRealRobotGoalEnv.MyRealRobotGoalEnv):
             'desired_goal': self.desired_goal_space
         })
 
+        # Pre-allocated buffers to build the observation, achieved_goal and desired_goal in-place
+        # (e.g. self._obs_buf[:] = ...) in _get_observation, _get_achieved_goal and _get_desired_goal.
+        # Return a copy of them: step and reset hand out the returned arrays as is, and the caller may keep them
+        # (e.g. SB3 vec envs keep the terminal observation after calling reset).
+        self._obs_buf = np.empty(self.observation_space['observation'].shape,
+                                 dtype=self.observation_space['observation'].dtype)
+        self._ag_buf = np.empty(self.achieved_goal_space.shape, dtype=self.achieved_goal_space.dtype)
+        self._dg_buf = np.empty(self.desired_goal_space.shape, dtype=self.desired_goal_space.dtype)
+
+        """
+        Maximum number of steps per episode.
+        The truncation is done in the compute_truncated method and the step counter is reset in reset, so we don't
+        register the env with max_episode_steps (which wraps the env with a TimeLimit wrapper).
+        """
+        self._max_episode_steps = 100
+        self._step_count = 0
+
         """
         Define subscribers/publishers and Markers as needed.
         """
 
-        # self.goal_marker = ros_markers.RosMarker(frame_id="world", ns="", marker_type=2, marker_topic="goal_pos",
-        #                                          lifetime=10.0)
+        # Subscribers for observations: only keep the latest message.
+        #   queue_size=1: drop old messages instead of queueing them behind a slow callback
+        #   buff_size: large enough to hold a whole message (the default 64KB causes lags with big messages)
+        #   tcp_nodelay=True: disable Nagle's algorithm, so small messages are sent right away
+        # self._latest_msg = None
+        # self.sub = rospy.Subscriber("/topic_name", MsgType, self._sub_callback, queue_size=1, buff_size=2**24,
+        #                             tcp_nodelay=True)
+
+        # Markers are created lazily (see the goal_marker property below), so headless training doesn't advertise
+        # marker topics that are never used. Access self.goal_marker when you want to visualize the goal.
 
         """
         Init super class.
@@ -153,11 +179,26 @@ class MyRealTaskGoalEnv(MyRealRobotGoalEnv.MyRealRobotGoalEnv):
         """
         Finished __init__ method
         """
-        rospy.loginfo("Finished Init of Custom Task Env")
+        if ros_common.is_log_level_enabled(logging.INFO):
+            rospy.loginfo("Finished Init of Custom Task Env")
 
     # -------------------------------------------------------
     #   Methods for interacting with the environment
 
+    def reset(self, seed: Optional[int] = None, options: Optional[Dict[str, Any]] = None):
+        """
+        Reset the environment.
+
+        Resets the step counter used by compute_truncated here, so overriding _set_init_params doesn't affect it.
+
+        Args:
+            seed (int): The seed for the random number generator.
+            options (dict): Additional options for resetting the environment.
+        """
+        self._step_count = 0
+
+        return super().reset(seed=seed, options=options)
+
     def _set_init_params(self, options: Optional[Dict[str, Any]] = None):
         """
         Set initial parameters for the environment.
@@ -172,6 +213,7 @@ class MyRealTaskGoalEnv(MyRealRobotGoalEnv.MyRealRobotGoalEnv):
         """
         raise NotImplementedError()
 
+    @abstractmethod
     def _set_action(self, action):
         """
         Function to apply an action to the robot.
@@ -179,11 +221,14 @@ class MyRealTaskGoalEnv(MyRealRobotGoalEnv.MyRealRobotGoalEnv):
         This method should be implemented here to apply the given action to the robot. The action could be a
         joint position command, a velocity command, or any other type of command that can be applied to the robot.
 
+        Use the pre-allocated self._action_buf to process the action without allocating a new array, e.g.
+            self._np_clip(action, 0.0, 1.0, out=self._action_buf)
+
         Args:
             action: The action to be applied to the robot.
         """
-        raise NotImplementedError()
 
+    @abstractmethod
     def _get_observation(self):
         """
         Function to get an observation from the environment.
@@ -192,67 +237,87 @@ class MyRealTaskGoalEnv(MyRealRobotGoalEnv.MyRealRobotGoalEnv):
         the environment. The observation could be a sensor reading, a joint state, or any other type of observation
         that can be obtained from the environment.
 
+        Fill the pre-allocated buffer in-place and return a copy of it (the caller may keep the returned array), e.g.
+            self._obs_buf[:] = ...
+            return self._obs_buf.copy()
+
         Returns:
             An observation representing the current state of the environment.
         """
-        raise NotImplementedError()
 
+    @abstractmethod
     def _get_achieved_goal(self):
         """
         Get the achieved goal from the environment.
 
+        Fill the pre-allocated buffer in-place and return a copy of it (the caller may keep the returned array), e.g.
+            self._ag_buf[:] = ...
+            return self._ag_buf.copy()
+
         Returns:
             achieved_goal (Any): The achieved goal representing the current state of the environment.
         """
-        raise NotImplementedError()
 
+    @abstractmethod
     def _get_desired_goal(self):
         """
         Get the desired goal from the environment.
 
+        Fill the pre-allocated buffer in-place and return a copy of it (the caller may keep the returned array), e.g.
+            self._dg_buf[:] = ...
+            return self._dg_buf.copy()
+
         Returns:
             desired_goal (Any): The desired goal representing the target state of the environment.
         """
-        raise NotImplementedError()
 
-    def compute_reward(self, achieved_goal, desired_goal, info) -> float:
+    def compute_reward(self, achieved_goal: np.ndarray, desired_goal: np.ndarray,
+                       info) -> Union[np.ndarray, float]:
         """
         Compute the reward for achieving a given goal.
 
-        This method should be implemented here to return a scalar reward value representing how well the agent
+        This method should be implemented here to return a reward value representing how well the agent
         is doing in the current episode. The reward could be based on the distance to a goal, the amount of time taken
         to reach a goal, or any other metric that can be used to measure how well the agent is doing.
 
+        Keep this method vectorized. HER (e.g. Stable Baselines3) calls it once with a batch of relabeled goals of
+        shape (N, 3) and expects N rewards back, instead of calling it once per transition.
+        The default implementation is a sparse reward based on the distance between the goals.
+
         Args:
-            achieved_goal (Any): The achieved goal representing the current state of the environment.
-            desired_goal (Any): The desired goal representing the target state of the environment.
+            achieved_goal (np.ndarray): The achieved goal(s), shape (..., 3).
+            desired_goal (np.ndarray): The desired goal(s), shape (..., 3).
             info (dict): Additional information about the environment.
 
         Returns:
-            reward (float): The reward for achieving the given goal.
+            reward (np.ndarray | float): The reward(s) for achieving the given goal(s), shape (...).
         """
+        d = self._goal_distance(achieved_goal, desired_goal)
+        return -(d > self._threshold).astype(np.float32)
 
-        raise NotImplementedError()
-
-    def compute_terminated(self, achieved_goal, desired_goal, info):
+    def compute_terminated(self, achieved_goal: np.ndarray, desired_goal: np.ndarray,
+                           info) -> Union[np.ndarray, bool]:
         """
         Function to check if the episode is terminated due to reaching a terminal state.
 
         This method should be implemented here to return a boolean value indicating whether the episode has
         ended (e.g., because a goal has been reached or a failure condition has been triggered).
+        Same as compute_reward, it accepts a batch of goals of shape (N, 3).
 
         Args:
-            achieved_goal (Any): The achieved goal representing the current state of the environment.
-            desired_goal (Any): The desired goal representing the target state of the environment.
+            achieved_goal (np.ndarray): The achieved goal(s), shape (..., 3).
+            desired_goal (np.ndarray): The desired goal(s), shape (..., 3).
             info (dict): Additional information for computing the termination condition.
 
         Returns:
-            A boolean value indicating whether the episode has ended
+            A boolean value (or array of shape (...)) indicating whether the episode has ended
             (e.g., because a goal has been reached or a failure condition has been triggered)
         """
-        raise NotImplementedError()
+        d = self._goal_distance(achieved_goal, desired_goal)
+        return d <= self._threshold
 
-    def compute_truncated(self, achieved_goal, desired_goal, info):
+    def compute_truncated(self, achieved_goal: np.ndarray, desired_goal: np.ndarray,
+                          info) -> Union[np.ndarray, bool]:
         """
         Function to check if the episode is truncated due non-terminal reasons.
 
@@ -261,45 +326,81 @@ class MyRealTaskGoalEnv(MyRealRobotGoalEnv.MyRealRobotGoalEnv):
         Truncated states are those that are out of the scope of the Markov Decision Process (MDP).
         This could include truncation due to reaching a maximum number of steps, or any other non-terminal condition
         that causes the episode to end early.
+        Same as compute_reward, it accepts a batch of goals of shape (N, 3).
 
         Args:
-            achieved_goal (Any): The achieved goal representing the current state of the environment.
-            desired_goal (Any): The desired goal representing the target state of the environment.
+            achieved_goal (np.ndarray): The achieved goal(s), shape (..., 3).
+            desired_goal (np.ndarray): The desired goal(s), shape (..., 3).
             info (dict): Additional information for computing the truncation condition.
 
         Returns:
-            A boolean value indicating whether the episode has been truncated.
+            A boolean value (or array of shape (...)) indicating whether the episode has been truncated.
         """
-        raise NotImplementedError()
+        # batch of goals (e.g. HER relabeling): not a real step of the env
+        batch_shape = np.shape(achieved_goal)[:-1]
+        if batch_shape:
+            return np.zeros(batch_shape, dtype=bool)
+
+        self._step_count += 1
+        return self._step_count >= self._max_episode_steps
+
+    def _goal_distance(self, achieved_goal: np.ndarray, desired_goal: np.ndarray) -> Union[np.ndarray, float]:
+        """
+        Euclidean distance between the goals, computed over the last axis so that it works for batches of goals.
+        """
+        return self._np_norm(achieved_goal - desired_goal, axis=-1)
 
     # -------------------------------------------------------
     #   Include any custom methods available for the MyTaskEnv class
 
+    # def _sub_callback(self, msg):
+    #     """
+    #     Keep only the latest message. _get_observation reads self._latest_msg, so it always uses the freshest data.
+    #     """
+    #     self._latest_msg = msg
+
+    @functools.cached_property
+    def goal_marker(self):
+        """
+        Marker to visualize the goal. Only created (and advertised to the ROS Master) on first access.
+        """
+        from realros.utils import ros_markers
+
+        return ros_markers.RosMarker(frame_id="world", ns="", marker_type=2, marker_topic="goal_pos", lifetime=10.0)
+
     def _get_params(self):
         """
         Function to get configuration parameters (optional)
-        """
-        raise NotImplementedError()
 
-    # ------------------------------------------------------
-    #   Task Methods for launching roscore
+        Use self._param(name, default) instead of rospy.get_param(name) to read the parameters. rospy.get_param
+        queries the ROS Master on every call, while self._param uses the local parameter cache.
 
-    @staticmethod
-    def _launch_roscore(port=None, set_new_master_vars=False, default_port=False):
+        example:
+            self.max_steps = self._param("/my_task/max_steps", 100)
         """
-        Launches a new roscore with the specified port. Only updates the ros_port.
+        raise NotImplementedError()
 
-        Return:
-            ros_port: port of launched roscore
+    @staticmethod
+    def _param(name: str, default=None):
         """
+        Get a parameter from the parameter server using the local parameter cache.
 
-        if port is None:
-            port = 11311  # default port
+        Args:
+            name (str): Name of the parameter.
+            default: Value to return if the parameter is not set.
 
-        ros_port = ros_common.launch_roscore(port=port, set_new_master_vars=set_new_master_vars,
-                                             default_port=default_port)
+        Returns:
+            The value of the parameter, or the default value if it is not set.
+        """
+        return ros_common.get_cached_param(name, default)
 
-        # change to new rosmaster
-        ros_common.change_ros_master(ros_port)
 
-        return ros_port
+# Register your environment using the gymnasium register method to utilize gym.make("MyRealTaskGoalEnv-v0").
+# Registered here, after the class definition, so the class itself can be the entry point.
+# Only skipped if the id is already registered to this same class. If it is registered to another class (e.g. a copy
+# of this template that kept the id, or a reload of this module), it is registered again and gymnasium warns about it.
+if 'MyRealTaskGoalEnv-v0' not in registry or registry['MyRealTaskGoalEnv-v0'].entry_point is not MyRealTaskGoalEnv:
+    register(
+        id='MyRealTaskGoalEnv-v0',
+        entry_point=MyRealTaskGoalEnv,
+    )
@@ -23,17 +23,36 @@ It has the following functions,
     18. change_ros_master_multi_device: Set the current ROS Master Environment Variable for multi-device
     19. init_robot_state_publisher: Initialize the robot state publisher.
     20. remove_all_from_rosmaster_list: Remove all ports from the Multiros rosmaster port list.
+    21. cache_rosout_params: Cache the rosout parameters locally to avoid ROS Master lookups on every log call.
+    22. ensure_master: Launch or connect to the ROS Master of an environment and set it as the current ROS Master.
+    23. get_cached_param: Get a parameter from the local parameter cache, querying the ROS Master only once.
+    24. is_log_level_enabled: Check if rospy logs messages of a given level.
+    25. init_node_once: Init the ROS node of this process if it is not initialised yet.
 
 """
+import logging
+import rosgraph
 import rosparam
 import rospy
 import rospkg
+import rospy.impl.rosout as rosout
+from rospy.impl.registration import get_topic_manager
+from rosgraph_msgs.msg import Log
 import os
 import subprocess
 import time
 import random
+import threading
+import traceback
 import xacro
-from typing import Tuple, Union
+from typing import Dict, Optional, Tuple, Union
+
+# roscores launched by this process, keyed by (pid, port, default_port). Lets repeated env inits reuse them
+_ROSCORE_CACHE: Dict[tuple, str] = {}
+_ROSCORE_CACHE_LOCK = threading.Lock()
+
+# ROS_MASTER_URI the node of this process was initialised with (by init_node_once)
+_NODE_MASTER_URI: Optional[str] = None
 
 
 def launch_roscore(port: int = None, set_new_master_vars: bool = True, default_port: bool = False) -> str:
@@ -848,3 +867,188 @@ def remove_all_from_rosmaster_list() -> bool:
     rospy.loginfo("Removed all ports from the RealROS rosmaster port list!")
 
     return True
+
+
+def cache_rosout_params() -> bool:
+    """
+    Function to make rospy read the rosout parameters from the local parameter cache.
+
+    Every rospy log call (rospy.loginfo, etc.) checks "/rosout_disable_topics_generation" with rospy.has_param and
+    rospy.get_param before publishing to /rosout. Both are blocking XML-RPC calls to the ROS Master on each log line.
+    This replaces the rospy rosout function with one that reads the parameter with rospy.get_param_cached, so only the
+    first log call queries the ROS Master. Calling it more than once has no effect.
+
+    Returns:
+        bool: True if the rosout parameters are read from the cache, False if the rospy version does not support
+              cached parameters.
+    """
+
+    if not hasattr(rospy, "get_param_cached") or not hasattr(rosout, "_rosout"):
+        rospy.logdebug("rospy.get_param_cached is not available! Rosout parameters are not cached.")
+        return False
+
+    if rosout._rosout is _rosout_cached:
+        return True
+
+    # RosOutHandler looks up rosout._rosout on each log call, so replacing the module attribute is enough
+    rosout._rosout = _rosout_cached
+
+    rospy.logdebug("Rosout parameters are read from the local parameter cache!")
+
+    return True
+
+
+# helper fn for cache_rosout_params
+def _rosout_cached(level, msg, fname, line, func):
+    """
+    Same as rospy.impl.rosout._rosout, but reads "/rosout_disable_topics_generation" from the local parameter cache.
+    """
+
+    try:
+        # protect against infinite recursion
+        if rosout._rosout_pub is not None and not rosout._in_rosout:
+            try:
+                rosout._in_rosout = True
+
+                if not rospy.get_param_cached("/rosout_disable_topics_generation", False):
+                    topics = get_topic_manager().get_topics()
+                else:
+                    topics = ""
+
+                log_msg = Log(level=level, name=str(rospy.names.get_caller_id()), msg=str(msg), topics=topics,
+                              file=fname, line=line, function=func)
+                log_msg.header.stamp = rospy.Time.now()
+                rosout._rosout_pub.publish(log_msg)
+            finally:
+                rosout._in_rosout = False
+    except Exception as e:
+        # don't use rospy.logerr in here as that is recursive
+        logging.getLogger("rospy.rosout").error("Unable to report rosout: %s\n%s", e, traceback.format_exc())
+        return False
+
+
+def ensure_master(default_port: bool = False, new_roscore: bool = True, roscore_port: str = None) -> Optional[str]:
+    """
+    Function to launch or connect to the ROS Master of an environment and set it as the current ROS Master.
+
+    A roscore launched by this process with the same args is reused if it is still running, so creating several
+    environments in the same process doesn't launch a new roscore each time.
+
+    Args:
+        default_port (bool): If True, launch the roscore with default port 11311.
+        new_roscore (bool): If True, launch a new roscore (with roscore_port if given).
+        roscore_port (str): The ROS_MASTER_URI port to launch or, if new_roscore is False, of a running roscore.
+
+    Returns:
+        str: Port of the ROS Master, or None if the already running ROS Master of the current ROS_MASTER_URI is used.
+    """
+
+    # use the already running roscore with the given port
+    if not default_port and not new_roscore and roscore_port is not None:
+        change_ros_master(roscore_port)
+        return roscore_port
+
+    # use the already running roscore of the current ROS_MASTER_URI
+    if not default_port and not new_roscore:
+        if is_roscore_running():
+            return None
+        print("roscore is not running! Launching a new roscore!")
+
+    if default_port or roscore_port is None:
+        port = 11311  # default port
+    else:
+        port = int(roscore_port)
+
+    key = (os.getpid(), port, default_port)
+
+    with _ROSCORE_CACHE_LOCK:
+        # reuse the roscore launched by a previous env in this process, if it is still running
+        ros_port = _ROSCORE_CACHE.get(key)
+        if ros_port is not None:
+            # rospy.get_master() is memoized to the first master of the process, so check the cached port directly
+            try:
+                rosgraph.Master('/ensure_master', master_uri=f"http://localhost:{ros_port}").getPid()
+            except OSError:
+                rospy.logwarn(f"Cached roscore with port {ros_port} is not running! Launching a new roscore!")
+            else:
+                change_ros_master(ros_port)
+                return ros_port
+
+        ros_port = launch_roscore(port=port, set_new_master_vars=False, default_port=default_port)
+        _ROSCORE_CACHE[key] = ros_port
+
+    # change to new rosmaster
+    change_ros_master(ros_port)
+
+    return ros_port
+
+
+def get_cached_param(param_name: str, default=None):
+    """
+    Function to get a parameter from the parameter server using the local parameter cache.
+
+    The first lookup of a parameter subscribes to it and stores it in the local cache. The following lookups are
+    served from the cache, so they don't need a blocking XML-RPC call to the ROS Master.
+    Falls back to rospy.get_param if the rospy version does not support cached parameters.
+
+    Args:
+        param_name (str): Name of the parameter.
+        default: Value to return if the parameter is not set.
+
+    Returns:
+        The value of the parameter, or the default value if it is not set.
+    """
+
+    if hasattr(rospy, "get_param_cached"):
+        return rospy.get_param_cached(param_name, default)
+
+    return rospy.get_param(param_name, default)
+
+
+def is_log_level_enabled(level: int = logging.INFO) -> bool:
+    """
+    Function to check if rospy logs messages of the given level.
+
+    rospy log calls format the message and publish it to /rosout even if nobody reads it. Use this to skip log
+    calls (e.g. the ones with expensive messages) when the level is disabled.
+
+    Args:
+        level (int): The logging level (e.g. logging.INFO, logging.DEBUG).
+
+    Returns:
+        bool: True if messages of the given level are logged, False otherwise.
+    """
+
+    # rospy logs through the "rosout" python logger
+    return logging.getLogger("rosout").isEnabledFor(level)
+
+
+def init_node_once(node_name: str, **kwargs) -> bool:
+    """
+    Function to init the ROS node of this process if it is not initialised yet.
+
+    A process can only have one ROS node, so if it is already initialised (e.g. the env is re-created in a notebook
+    or a sweep), the node is not initialised again. In that case, it warns if the current ROS_MASTER_URI is not the
+    one the node is registered with, since the node keeps using its original ROS Master.
+
+    Args:
+        node_name (str): Name of the node.
+        **kwargs: Additional args for rospy.init_node (e.g. anonymous, disable_signals).
+
+    Returns:
+        bool: True if the node was initialised, False if the process already had a node.
+    """
+
+    global _NODE_MASTER_URI
+
+    if not rospy.core.is_initialized():
+        rospy.init_node(node_name, **kwargs)
+        _NODE_MASTER_URI = os.environ.get("ROS_MASTER_URI")
+        return True
+
+    current_master_uri = os.environ.get("ROS_MASTER_URI")
+    if _NODE_MASTER_URI is not None and _NODE_MASTER_URI != current_master_uri:
+        rospy.logwarn(f"The ROS node {rospy.get_name()} is already initialised with the ROS Master {_NODE_MASTER_URI}, "
+                      f"not the current one {current_master_uri}! The env keeps using {_NODE_MASTER_URI}.")
+
+    return False